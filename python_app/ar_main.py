@@ -1,6 +1,8 @@
 import sys
 import os
 import json
+import argparse
+import tracemalloc
 from pathlib import Path
 import numpy as np
 
@@ -14,6 +16,9 @@ import cv2
 import cv2.aruco as aruco
 
 from circuit_engine.loader import load_series_circuit_from_json
+from circuit_engine.solver import solve_series_circuit
+from python_app.stream_server import StreamServer
+from python_app.frame_pool import FrameBufferPool
 
 
 # ================= ASSETS =================
@@ -78,24 +83,38 @@ def force_remove_background(img):
     return cv2.merge([b, g, r, alpha])
 
 
-def overlay_image(frame, img, x, y):
+def prepare_overlay(img):
+    """
+    Precompute a BGRA image for overlay_image():
+      (alpha-premultiplied BGR, 3-channel inverse alpha), both uint8.
+    Done once at load time so blending needs no per-frame temporaries.
+    """
     if img is None:
+        return None
+
+    b, g, r, a = cv2.split(img)
+    alpha = cv2.merge([a, a, a])
+    premult = cv2.multiply(cv2.merge([b, g, r]), alpha, scale=1 / 255.0)
+    inv_alpha = cv2.bitwise_not(alpha)
+    return premult, inv_alpha
+
+
+def overlay_image(frame, overlay, x, y):
+    if overlay is None:
         return
 
-    h, w = img.shape[:2]
+    premult, inv_alpha = overlay
+    h, w = premult.shape[:2]
     x1, y1 = x - w // 2, y - h // 2
     x2, y2 = x1 + w, y1 + h
 
     if x1 < 0 or y1 < 0 or x2 > frame.shape[1] or y2 > frame.shape[0]:
         return
 
-    alpha = img[:, :, 3] / 255.0
-
-    for c in range(3):
-        frame[y1:y2, x1:x2, c] = (
-            alpha * img[:, :, c] +
-            (1 - alpha) * frame[y1:y2, x1:x2, c]
-        )
+    # roi = roi * (1 - alpha) + img * alpha, in place on the frame view
+    roi = frame[y1:y2, x1:x2]
+    cv2.multiply(roi, inv_alpha, dst=roi, scale=1 / 255.0)
+    cv2.add(roi, premult, dst=roi)
 
 
 # ============ SIMPLE LAYOUT ============
@@ -131,46 +150,88 @@ def load_experiment_json(exp_id: int):
     }
 
     if exp_id not in file_map:
-        return [], "No experiment mapped"
+        return [], "No experiment mapped", None
 
     path = Path("experiments") / file_map[exp_id]
 
     if not path.exists():
-        return [], f"Missing file: {path.name}"
+        return [], f"Missing file: {path.name}", None
 
     try:
-        _, steps = load_series_circuit_from_json(path)
+        circuit, steps = load_series_circuit_from_json(path)
     except json.JSONDecodeError:
-        return [], "Invalid JSON file"
-
-    return steps, f"Loaded: {path.name}"
+        return [], "Invalid JSON file", None
+
+    return steps, f"Loaded: {path.name}", solve_series_circuit(circuit)
+
+
+# ============ STREAM STATE ============
+def build_stream_state(marker, status, steps, current_step, solution,
+                       visible_components, connections):
+    return {
+        "marker": marker,
+        "status": status,
+        "step_index": current_step,
+        "step_count": len(steps),
+        "step": steps[current_step] if steps and current_step >= 0 else None,
+        "visible_components": list(visible_components),
+        "connections": [list(c) for c in connections],
+        "solution": solution,
+    }
 
 
 # ================= MAIN =================
-def main():
+def main(stream_port=None, stream_host="127.0.0.1", debug=False):
     cap = cv2.VideoCapture(0)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
 
+    # Buffers are reused every frame; sized from the first captured frame
+    # and reallocated only on resolution change
+    pool = FrameBufferPool()
+
     aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_5X5_100)
 
     current_marker = None
     current_step = -1
     steps = []
     status = "No marker detected"
+    solution = None
 
     visible_components = []
     component_images = {}
     connections = []
 
+    server = None
+    last_state_key = None
+    if stream_port is not None:
+        server = StreamServer(host=stream_host, port=stream_port,
+                              release=pool.release)
+        try:
+            server.start()
+        except OSError as exc:
+            print(f"❌ Could not start stream server on port {stream_port}: {exc}")
+            cap.release()
+            return
+        print(f"📡 Streaming on http://{stream_host}:{server.port}/")
+
+    frame_count = 0
+    if debug:
+        tracemalloc.start()
+
     print("✅ eYantra AR running | N: next | R: reset | Q: quit")
 
     while True:
-        ret, frame = cap.read()
+        if debug:
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+
+        ret, frame = cap.read(pool.capture)
         if not ret:
             break
+        pool.adopt_capture(frame)
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.gray)
         corners, ids, _ = aruco.detectMarkers(gray, aruco_dict)
 
         if ids is not None:
@@ -178,14 +239,14 @@ def main():
             aruco.drawDetectedMarkers(frame, corners, ids)
 
             if marker_id != current_marker:
-                steps, status = load_experiment_json(marker_id)
+                steps, status, solution = load_experiment_json(marker_id)
                 current_marker = marker_id
                 current_step = -1
                 visible_components.clear()
                 component_images.clear()
                 connections.clear()
 
-        frame = cv2.flip(frame, 1)
+        frame = cv2.flip(frame, 1, dst=pool.mirror)
 
         # Status
         cv2.putText(frame, status, (10, 30),
@@ -214,6 +275,30 @@ def main():
 
         cv2.imshow("eYantra AR Circuit Lab", frame)
 
+        if server is not None:
+            # The mirror buffer is reused next frame, so hand the encoder a
+            # pooled copy; it comes back through pool.release
+            out = pool.acquire_composite()
+            np.copyto(out, frame)
+            server.publish_frame(out)
+
+            state_key = (current_marker, status, current_step,
+                         len(visible_components), len(connections))
+            if state_key != last_state_key:
+                server.publish_state(build_stream_state(
+                    current_marker, status, steps, current_step,
+                    solution, visible_components, connections))
+                last_state_key = state_key
+
+        if debug:
+            frame_count += 1
+            current, peak = tracemalloc.get_traced_memory()
+            if frame_count % 100 == 0:
+                print(f"[debug] frame {frame_count}: "
+                      f"{(peak - mem_start) / 1024:.1f} KB allocated, "
+                      f"{(current - mem_start) / 1024:.1f} KB retained, "
+                      f"pool allocations: {pool.allocations}")
+
         key = cv2.waitKey(1) & 0xFF
 
         if key == ord("n") and steps:
@@ -230,7 +315,7 @@ def main():
                             img = cv2.imread(str(img_path), cv2.IMREAD_UNCHANGED)
                             img = force_remove_background(img)
                             img = cv2.resize(img, (120, 120))
-                        component_images[comp] = img
+                        component_images[comp] = prepare_overlay(img)
                         visible_components.append(comp)
 
                 elif step["type"] == "connect":
@@ -251,9 +336,22 @@ def main():
         elif key == ord("q"):
             break
 
+    if server is not None:
+        server.stop()
+    if debug:
+        tracemalloc.stop()
     cap.release()
     cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="eYantra AR Circuit Lab")
+    parser.add_argument("--stream", type=int, metavar="PORT", default=None,
+                        help="serve MJPEG + WebSocket state on this port")
+    parser.add_argument("--stream-host", default="127.0.0.1", metavar="HOST",
+                        help="interface to stream on (0.0.0.0 = whole network)")
+    parser.add_argument("--debug", action="store_true",
+                        help="report per-frame allocations every 100 frames")
+    args = parser.parse_args()
+    main(stream_port=args.stream, stream_host=args.stream_host,
+         debug=args.debug)
@@ -0,0 +1,79 @@
+# python_app/frame_pool.py
+
+"""
+Preallocated frame buffers for the AR render loop.
+
+Buffers are allocated once per capture resolution and reused every frame:
+  - capture    : BGR frame filled by cap.read()
+  - gray       : grayscale image for marker detection
+  - mirror     : horizontally flipped capture, drawn on and displayed
+  - composite  : small free-list of BGR buffers handed to the stream encoder
+
+Composite buffers are created on first use (so nothing is spent on them
+when streaming is off) and only reused after the consumer gives them back
+with release(), so a frame is never overwritten while it is being encoded.
+"""
+
+import threading
+from collections import deque
+from typing import Tuple
+
+import numpy as np
+
+
+class FrameBufferPool:
+    def __init__(self, composite_count: int = 3):
+        self.shape: Tuple[int, int] = (0, 0)
+        self.composite_count = composite_count
+        self.allocations = 0          # buffers allocated since creation
+
+        self.capture = None
+        self.gray = None
+        self.mirror = None
+
+        self._free = deque()
+        self._lock = threading.Lock()
+
+    def _alloc(self, shape) -> np.ndarray:
+        self.allocations += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def _resize(self, height: int, width: int):
+        self.gray = self._alloc((height, width))
+        self.mirror = self._alloc((height, width, 3))
+        with self._lock:
+            self.shape = (height, width)
+            self._free.clear()
+
+    def adopt_capture(self, frame: np.ndarray):
+        """
+        Sync the pool with the frame returned by cap.read(self.capture).
+        Normally that is the capture buffer itself; if the camera handed
+        back a new array instead (first frame, resolution change), resize
+        the pool and keep that array as the capture buffer.
+        """
+        if frame is self.capture:
+            return
+        self.allocations += 1         # cap.read() allocated this frame
+        if frame.shape[:2] != self.shape:
+            self._resize(frame.shape[0], frame.shape[1])
+        self.capture = frame
+
+    def acquire_composite(self) -> np.ndarray:
+        """Take a composite buffer; allocates only if none are free."""
+        with self._lock:
+            while self._free:
+                buf = self._free.popleft()
+                if buf.shape[:2] == self.shape:
+                    return buf
+        return self._alloc(self.shape + (3,))
+
+    def release(self, buf: np.ndarray):
+        """Return a composite buffer (safe to call from any thread)."""
+        with self._lock:
+            # Checked under the lock so a concurrent resize can't let a
+            # buffer from the old resolution back in
+            if buf.shape[:2] != self.shape:
+                return
+            if len(self._free) < self.composite_count:
+                self._free.append(buf)
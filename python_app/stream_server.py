@@ -0,0 +1,396 @@
+# python_app/stream_server.py
+
+"""
+Local streaming server for the composited AR view.
+
+Publishes frames as MJPEG over HTTP and step / solver state as JSON over
+WebSocket, using only the standard library and asyncio.
+
+  GET /             -> small viewer page
+  GET /stream.mjpg  -> multipart/x-mixed-replace JPEG stream
+  GET /state        -> WebSocket, one JSON text message per state change
+
+The render loop only calls publish_frame() / publish_state(), which never
+block: JPEG encoding runs on its own worker thread, and every client has a
+latest-value-only slot, so a slow client just skips frames.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+from typing import Any, Callable, Dict, Optional, Set
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+BOUNDARY = "eyantraframe"
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<head><title>eYantra AR Circuit Lab</title></head>
+<body style="background:#111;color:#eee;font-family:sans-serif">
+<h3>eYantra AR Circuit Lab</h3>
+<img src="/stream.mjpg" style="max-width:100%">
+<pre id="state">waiting for state...</pre>
+<script>
+var ws = new WebSocket("ws://" + location.host + "/state");
+ws.onmessage = function (e) {
+  document.getElementById("state").textContent =
+    JSON.stringify(JSON.parse(e.data), null, 2);
+};
+</script>
+</body>
+</html>
+"""
+
+
+# ================= HELPERS =================
+def encode_jpeg(frame, quality: int = 80) -> Optional[bytes]:
+    """Default encoder: BGR numpy frame -> JPEG bytes (None on failure)."""
+    import cv2  # only needed when the default encoder is used
+
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes() if ok else None
+
+
+def websocket_accept_key(key: str) -> str:
+    digest = hashlib.sha1((key + WS_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def websocket_text_frame(text: str) -> bytes:
+    """Build a single unmasked server -> client text frame."""
+    payload = text.encode("utf-8")
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x81, n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x81, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, n)
+    return header + payload
+
+
+class LatestSlot:
+    """
+    Single-item asyncio queue that keeps only the newest value.
+    put() never blocks; an unread value is simply replaced.
+    """
+
+    def __init__(self):
+        self._value = None
+        self._event = asyncio.Event()
+
+    def put(self, value):
+        self._value = value
+        self._event.set()
+
+    async def get(self):
+        await self._event.wait()
+        self._event.clear()
+        value, self._value = self._value, None
+        return value
+
+
+# ================= SERVER =================
+class StreamServer:
+    """
+    MJPEG + WebSocket server running its own asyncio loop on a daemon thread.
+
+    Usage:
+        server = StreamServer(port=8080)
+        server.start()
+        ... server.publish_frame(frame); server.publish_state({...}) ...
+        server.stop()
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        encoder: Callable[[Any], Optional[bytes]] = encode_jpeg,
+        release: Optional[Callable[[Any], None]] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.encoder = encoder
+        # Called with each published frame once the server is done with it
+        # (encoded or dropped), so the caller can reuse the buffer.
+        self.release = release
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._start_error: Optional[BaseException] = None
+
+        # Encoder worker: latest raw frame only
+        self._encoder_thread: Optional[threading.Thread] = None
+        self._pending_frame = None
+        self._frame_cond = threading.Condition()
+        self._running = False
+        self._encode_error_logged = False
+
+        # Per-client slots (touched only from the loop thread)
+        self._frame_clients: Set[LatestSlot] = set()
+        self._state_clients: Set[LatestSlot] = set()
+        self._last_state: Optional[str] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ---------- lifecycle ----------
+    def start(self):
+        self._running = True
+        self._loop_thread = threading.Thread(
+            target=self._run_loop, name="stream-server", daemon=True
+        )
+        self._loop_thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            # e.g. OSError when the port is already in use
+            self._running = False
+            self._loop_thread.join()
+            raise self._start_error
+
+        self._encoder_thread = threading.Thread(
+            target=self._encode_worker, name="stream-encoder", daemon=True
+        )
+        self._encoder_thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+
+        with self._frame_cond:
+            self._frame_cond.notify()
+        self._encoder_thread.join()
+
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port)
+            )
+            # Resolve the real port when started with port=0
+            self.port = self._server.sockets[0].getsockname()[1]
+        except Exception as exc:
+            # Hand the error to start() in the caller's thread
+            self._start_error = exc
+            self._loop.close()
+            return
+        finally:
+            self._ready.set()
+
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    # ---------- publishing (called from the render loop) ----------
+    def publish_frame(self, frame):
+        """
+        Hand a composited frame to the encoder. Never blocks on encoding.
+        The caller must not modify the frame until it comes back via release.
+        """
+        # Nobody watching the MJPEG stream: skip the encode entirely
+        if not self._running or not self._frame_clients:
+            self._release(frame)
+            return
+        with self._frame_cond:
+            dropped, self._pending_frame = self._pending_frame, frame
+            self._frame_cond.notify()
+        if dropped is not None:
+            self._release(dropped)
+
+    def _release(self, frame):
+        if self.release is not None:
+            self.release(frame)
+
+    def publish_state(self, state: Dict[str, Any]):
+        """Send step / solver state to every WebSocket client."""
+        if not self._running:
+            return
+        message = json.dumps(state, default=str)
+        self._loop.call_soon_threadsafe(self._broadcast_state, message)
+
+    def _encode_worker(self):
+        while True:
+            with self._frame_cond:
+                while self._pending_frame is None and self._running:
+                    self._frame_cond.wait()
+                frame, self._pending_frame = self._pending_frame, None
+                if not self._running:
+                    if frame is not None:
+                        self._release(frame)
+                    return
+
+            try:
+                jpeg = self.encoder(frame)
+            except Exception as exc:
+                # Skip the frame but keep the worker alive
+                if not self._encode_error_logged:
+                    print(f"⚠️ Stream encoder failed, skipping frame: {exc!r}")
+                    self._encode_error_logged = True
+                jpeg = None
+            finally:
+                self._release(frame)
+            if jpeg is not None:
+                self._loop.call_soon_threadsafe(self._broadcast_frame, jpeg)
+
+    def _broadcast_frame(self, jpeg: bytes):
+        for slot in self._frame_clients:
+            slot.put(jpeg)
+
+    def _broadcast_state(self, message: str):
+        self._last_state = message
+        for slot in self._state_clients:
+            slot.put(message)
+
+    # ---------- HTTP ----------
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            request_line = await reader.readline()
+            parts = request_line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if len(parts) < 2 or parts[0] != "GET":
+                await self._send_simple(writer, "405 Method Not Allowed", b"")
+                return
+
+            path = parts[1].split("?")[0]
+            if path == "/":
+                await self._send_simple(
+                    writer, "200 OK", VIEWER_HTML.encode("utf-8"), "text/html"
+                )
+            elif path == "/stream.mjpg":
+                await self._serve_mjpeg(writer)
+            elif path == "/state" and "websocket" in headers.get("upgrade", "").lower():
+                await self._serve_websocket(reader, writer, headers)
+            else:
+                await self._send_simple(writer, "404 Not Found", b"")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._tasks.discard(task)
+            writer.close()
+
+    async def _send_simple(self, writer, status, body, content_type="text/plain"):
+        writer.write(
+            (
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+    async def _serve_mjpeg(self, writer):
+        slot = LatestSlot()
+        self._frame_clients.add(slot)
+        try:
+            writer.write(
+                (
+                    "HTTP/1.1 200 OK\r\n"
+                    f"Content-Type: multipart/x-mixed-replace; boundary={BOUNDARY}\r\n"
+                    "Cache-Control: no-cache\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("latin-1")
+            )
+            await writer.drain()
+            while True:
+                jpeg = await slot.get()
+                writer.write(
+                    (
+                        f"--{BOUNDARY}\r\n"
+                        "Content-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(jpeg)}\r\n\r\n"
+                    ).encode("latin-1")
+                    + jpeg
+                    + b"\r\n"
+                )
+                await writer.drain()
+        finally:
+            self._frame_clients.discard(slot)
+
+    # ---------- WebSocket ----------
+    async def _serve_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._send_simple(writer, "400 Bad Request", b"")
+            return
+
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {websocket_accept_key(key)}\r\n\r\n"
+            ).encode("latin-1")
+        )
+        await writer.drain()
+
+        slot = LatestSlot()
+        if self._last_state is not None:
+            slot.put(self._last_state)
+        self._state_clients.add(slot)
+
+        # Watch the client side so a closed socket ends the sender
+        closed = asyncio.ensure_future(self._read_until_close(reader))
+        get = None
+        try:
+            while True:
+                get = asyncio.ensure_future(slot.get())
+                done, _ = await asyncio.wait(
+                    {get, closed}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if closed in done:
+                    return
+                writer.write(websocket_text_frame(get.result()))
+                await writer.drain()
+        finally:
+            self._state_clients.discard(slot)
+            pending = [f for f in (get, closed) if f is not None]
+            for fut in pending:
+                fut.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _read_until_close(self, reader):
+        """Discard client frames until a close frame or EOF."""
+        try:
+            while True:
+                b1, b2 = await reader.readexactly(2)
+                length = b2 & 0x7F
+                if length == 126:
+                    (length,) = struct.unpack("!H", await reader.readexactly(2))
+                elif length == 127:
+                    (length,) = struct.unpack("!Q", await reader.readexactly(8))
+                if b2 & 0x80:
+                    await reader.readexactly(4)  # mask key
+                await reader.readexactly(length)
+                if b1 & 0x0F == 0x8:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
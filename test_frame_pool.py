@@ -0,0 +1,99 @@
+# test_frame_pool.py
+
+import numpy as np
+
+from python_app.frame_pool import FrameBufferPool
+
+
+def fake_read(pool, height=720, width=1280):
+    """Like cap.read(pool.capture): reuse the buffer if it fits."""
+    if pool.capture is not None and pool.capture.shape[:2] == (height, width):
+        return pool.capture
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+def test_buffers_allocated_once_per_resolution():
+    pool = FrameBufferPool(composite_count=3)
+
+    # First frame: the camera allocates, the pool sizes itself from it
+    pool.adopt_capture(fake_read(pool))
+    pool.release(pool.acquire_composite())    # first use creates it
+    first = pool.allocations
+    capture, gray, mirror = pool.capture, pool.gray, pool.mirror
+
+    assert capture.shape == (720, 1280, 3)
+    assert gray.shape == (720, 1280)
+    assert mirror.shape == (720, 1280, 3)
+
+    # Steady state: same buffers, no new allocations
+    for _ in range(100):
+        pool.adopt_capture(fake_read(pool))
+        buf = pool.acquire_composite()
+        pool.release(buf)
+
+    assert pool.allocations == first
+    assert pool.capture is capture and pool.gray is gray and pool.mirror is mirror
+
+
+def test_sized_from_first_frame():
+    pool = FrameBufferPool()
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    pool.adopt_capture(frame)
+
+    assert pool.capture is frame
+    assert pool.gray.shape == (480, 640)
+    assert pool.mirror.shape == (480, 640, 3)
+    # capture (from the camera), gray, mirror; no composites yet
+    assert pool.allocations == 3
+
+
+def test_resolution_change_reallocates():
+    pool = FrameBufferPool()
+    pool.adopt_capture(fake_read(pool))
+
+    frame = fake_read(pool, 480, 640)
+    pool.adopt_capture(frame)
+
+    assert pool.capture is frame
+    assert pool.gray.shape == (480, 640)
+    assert pool.acquire_composite().shape == (480, 640, 3)
+
+
+def test_composite_not_reused_until_released():
+    pool = FrameBufferPool(composite_count=2)
+    pool.adopt_capture(fake_read(pool, 10, 10))
+
+    a = pool.acquire_composite()
+    b = pool.acquire_composite()
+    before = pool.allocations
+    c = pool.acquire_composite()      # pool exhausted -> fresh buffer
+
+    assert pool.allocations == before + 1
+    assert c is not a and c is not b
+
+    pool.release(a)
+    assert pool.acquire_composite() is a
+
+
+def test_stale_composite_never_handed_out():
+    pool = FrameBufferPool()
+    pool.adopt_capture(np.zeros((720, 1280, 3), dtype=np.uint8))
+    old = pool.acquire_composite()
+
+    # Camera switches resolution while the encoder still holds `old`
+    pool.adopt_capture(np.zeros((480, 640, 3), dtype=np.uint8))
+    pool.release(old)
+    assert pool.acquire_composite().shape == (480, 640, 3)
+
+    # Even if a stale buffer slipped into the free list, it is skipped
+    pool._free.append(old)
+    assert pool.acquire_composite().shape == (480, 640, 3)
+
+
+if __name__ == "__main__":
+    test_buffers_allocated_once_per_resolution()
+    test_sized_from_first_frame()
+    test_resolution_change_reallocates()
+    test_composite_not_reused_until_released()
+    test_stale_composite_never_handed_out()
+    print("frame pool OK")
@@ -0,0 +1,62 @@
+# test_overlay.py
+
+import numpy as np
+
+from python_app.ar_main import prepare_overlay, overlay_image
+
+
+def make_sprite():
+    """120x120 BGRA image, half transparent everywhere."""
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (120, 120, 4), dtype=np.uint8)
+    img[:, :, 3] = 128
+    return img
+
+
+def float_blend(frame, img, x, y):
+    """Reference: the original float overlay formula."""
+    h, w = img.shape[:2]
+    x1, y1 = x - w // 2, y - h // 2
+    alpha = img[:, :, 3] / 255.0
+    for c in range(3):
+        frame[y1:y1 + h, x1:x1 + w, c] = (
+            alpha * img[:, :, c] +
+            (1 - alpha) * frame[y1:y1 + h, x1:x1 + w, c]
+        )
+
+
+def test_overlay_matches_float_blend():
+    rng = np.random.default_rng(1)
+    frame = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    expected = frame.copy()
+    original = frame.copy()
+    img = make_sprite()
+
+    overlay_image(frame, prepare_overlay(img), 300, 200)
+    float_blend(expected, img, 300, 200)
+
+    # Integer rounding vs float truncation: at most 1 level apart
+    diff = np.abs(frame.astype(int) - expected.astype(int))
+    assert diff.max() <= 1
+
+    # Written into the frame itself, nothing outside the ROI touched
+    outside = np.ones(frame.shape[:2], dtype=bool)
+    outside[140:260, 240:360] = False
+    assert not np.array_equal(frame[140:260, 240:360], original[140:260, 240:360])
+    assert np.array_equal(frame[outside], original[outside])
+
+
+def test_overlay_outside_frame_is_skipped():
+    frame = np.full((720, 1280, 3), 50, dtype=np.uint8)
+    overlay = prepare_overlay(make_sprite())
+
+    overlay_image(frame, overlay, 10, 10)        # crosses top-left edge
+    overlay_image(frame, overlay, 1275, 715)     # crosses bottom-right edge
+
+    assert (frame == 50).all()
+
+
+if __name__ == "__main__":
+    test_overlay_matches_float_blend()
+    test_overlay_outside_frame_is_skipped()
+    print("overlay OK")
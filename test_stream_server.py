@@ -0,0 +1,223 @@
+# test_stream_server.py
+
+import base64
+import json
+import os
+import socket
+import struct
+import time
+
+from python_app.stream_server import StreamServer, BOUNDARY
+
+
+def headless_frames():
+    """Fake frame source: raw bytes stand in for camera frames (no cv2 needed)."""
+    i = 0
+    while True:
+        yield f"frame-{i}".encode("ascii")
+        i += 1
+
+
+def start_server():
+    # Identity encoder: the 'JPEG' is the frame itself
+    server = StreamServer(port=0, encoder=lambda frame: frame)
+    server.start()
+    return server
+
+
+def read_until(sock, marker: bytes) -> bytes:
+    data = b""
+    while marker not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def test_mjpeg_stream():
+    server = start_server()
+    try:
+        sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        sock.sendall(b"GET /stream.mjpg HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        header = read_until(sock, b"\r\n\r\n")
+        assert b"200 OK" in header
+        assert f"boundary={BOUNDARY}".encode() in header
+
+        # Keep publishing until the client has seen at least one part
+        frames = headless_frames()
+        data = b""
+        deadline = time.time() + 5
+        sock.settimeout(0.1)
+        while b"frame-" not in data and time.time() < deadline:
+            server.publish_frame(next(frames))
+            try:
+                data += sock.recv(4096)
+            except socket.timeout:
+                pass
+
+        assert f"--{BOUNDARY}".encode() in data
+        assert b"Content-Type: image/jpeg" in data
+        assert b"frame-" in data
+        sock.close()
+    finally:
+        server.stop()
+
+
+def test_encoder_error_does_not_stop_stream():
+    calls = []
+
+    def flaky_encoder(frame):
+        calls.append(frame)
+        if len(calls) == 1:
+            raise ValueError("bad frame")
+        return frame
+
+    server = StreamServer(port=0, encoder=flaky_encoder)
+    server.start()
+    try:
+        sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        sock.sendall(b"GET /stream.mjpg HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        read_until(sock, b"\r\n\r\n")
+
+        # The first frame the encoder sees raises; later ones must still arrive
+        frames = headless_frames()
+        data = b""
+        deadline = time.time() + 5
+        sock.settimeout(0.1)
+        while b"frame-" not in data and time.time() < deadline:
+            server.publish_frame(next(frames))
+            try:
+                data += sock.recv(4096)
+            except socket.timeout:
+                pass
+
+        assert len(calls) >= 2
+        assert server._encoder_thread.is_alive()
+        assert b"frame-" in data
+        sock.close()
+    finally:
+        server.stop()
+
+
+def test_websocket_state():
+    server = start_server()
+    try:
+        server.publish_state({"step": 0, "text": "Place V1"})
+
+        sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        sock.sendall(
+            (
+                "GET /state HTTP/1.1\r\n"
+                "Host: localhost\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n\r\n"
+            ).encode("ascii")
+        )
+        data = read_until(sock, b"\r\n\r\n")
+        header, _, rest = data.partition(b"\r\n\r\n")
+        assert b"101 Switching Protocols" in header
+
+        def recv_message(buf):
+            while len(buf) < 2:
+                buf += sock.recv(4096)
+            length = buf[1] & 0x7F
+            start = 2
+            if length == 126:
+                while len(buf) < 4:
+                    buf += sock.recv(4096)
+                (length,) = struct.unpack("!H", buf[2:4])
+                start = 4
+            while len(buf) < start + length:
+                buf += sock.recv(4096)
+            assert buf[0] == 0x81
+            return json.loads(buf[start:start + length]), buf[start + length:]
+
+        # Latest state is sent on connect
+        msg, rest = recv_message(rest)
+        assert msg == {"step": 0, "text": "Place V1"}
+
+        server.publish_state({"step": 1, "solution": {"current": 0.005}})
+        msg, rest = recv_message(rest)
+        assert msg["step"] == 1
+        assert msg["solution"]["current"] == 0.005
+        sock.close()
+    finally:
+        server.stop()
+
+
+def test_unknown_path():
+    server = start_server()
+    try:
+        sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        sock.sendall(b"GET /nope HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        assert b"404 Not Found" in read_until(sock, b"\r\n\r\n")
+        sock.close()
+    finally:
+        server.stop()
+
+
+def test_frames_released_after_use():
+    released = []
+    server = StreamServer(port=0, encoder=lambda frame: frame,
+                          release=released.append)
+    server.start()
+    try:
+        source = headless_frames()
+        frames = [next(source) for _ in range(20)]
+        for frame in frames:
+            server.publish_frame(frame)
+    finally:
+        server.stop()
+
+    # Every frame comes back exactly once, whether encoded or dropped
+    assert sorted(released) == sorted(frames)
+
+
+def test_no_encoding_without_clients():
+    encoded = []
+    released = []
+    server = StreamServer(port=0, encoder=encoded.append,
+                          release=released.append)
+    server.start()
+    try:
+        source = headless_frames()
+        frames = [next(source) for _ in range(10)]
+        for frame in frames:
+            server.publish_frame(frame)
+    finally:
+        server.stop()
+
+    assert encoded == []
+    assert released == frames
+
+
+def test_port_in_use_raises():
+    busy = socket.socket()
+    busy.bind(("127.0.0.1", 0))
+    busy.listen(1)
+    try:
+        server = StreamServer(port=busy.getsockname()[1])
+        try:
+            server.start()
+        except OSError:
+            pass
+        else:
+            server.stop()
+            raise AssertionError("start() should fail on an occupied port")
+    finally:
+        busy.close()
+
+
+if __name__ == "__main__":
+    test_mjpeg_stream()
+    test_encoder_error_does_not_stop_stream()
+    test_websocket_state()
+    test_unknown_path()
+    test_frames_released_after_use()
+    test_no_encoding_without_clients()
+    test_port_in_use_raises()
+    print("stream server OK")